@@ -1,153 +1,256 @@
 import streamlit as st
+import numpy as np
 import random
-from typing import List
-
-class WordItem:
-    """单词数据类"""
-    def __init__(self, text: str):
-        self.text = text
-        self.total_count = 0  # 总共出现次数
-        self.last_seen_round = 0  # 上次出现的轮次
-        self.visible = True  # 当前是否可见
-        
-    def to_dict(self):
-        return {
-            "text": self.text,
-            "total_count": self.total_count,
-            "last_seen": self.last_seen_round,
-            "visible": self.visible
-        }
-
-class WordDisplay:
-    def __init__(self, word: WordItem):
-        self.word = word
-        self.size = random.randint(30, 60)
-        self.color = self._random_color()
-        self.rotation = random.uniform(-15, 15)
-        
-    def _random_color(self):
-        colors = [
-            "#1e88e5", "#2e7d32", "#d32f2f",
-            "#7b1fa2", "#f57c00", "#00897b",
-            "#c2185b", "#3949ab", "#5d4037"
-        ]
-        return random.choice(colors)
+from array import array
+from html import escape
+from typing import Dict, List
+
+# 页面文案与布局比例（模块级常量，重跑时不再重建）
+_TITLE = "A4纸背单词"
+_TOP_COLS = (5, 1)  # 输入表单 | 清除按钮
+_INPUT_COLS = (4, 1)  # 输入框 | 添加按钮
+_INPUT_LABEL = "输入新单词"
+_INPUT_PH = "输入英文单词后按回车或点击添加"
+# 单词卡片模板（单行、无缩进）：white-space: nowrap 禁止换行，min-width/padding 适配长单词
+_CARD_TPL = (
+    '<div style="font-size:{s}px;color:{c};transform:rotate({r}deg);margin:20px;'
+    'text-align:center;font-weight:bold;white-space:nowrap;min-width:150px;'
+    'padding:0 10px;">{t}</div>'
+)
+# 自定义红色按钮样式（静态内容，每次运行在页面顶部注入一次）
+_RED_BTN_CSS = """
+<style>
+div[data-testid="stButton"] > button:last-child,
+div[data-testid="stFormSubmitButton"] > button {
+    background-color: #d32f2f;
+    color: #ffffff;
+    border: none;
+    border-radius: 4px;
+    padding: 0.5rem 1rem;
+    width: 100%;
+}
+div[data-testid="stButton"] > button:last-child:hover,
+div[data-testid="stFormSubmitButton"] > button:hover {
+    background-color: #b71c1c;
+}
+</style>
+"""
+# 单词颜色候选（模块级元组，不必每次调用重建列表）
+_PALETTE = (
+    "#1e88e5", "#2e7d32", "#d32f2f",
+    "#7b1fa2", "#f57c00", "#00897b",
+    "#c2185b", "#3949ab", "#5d4037"
+)
+# 单词数超过该值时改用 NumPy 向量化计算可见性
+_VECTORIZE_MIN = 256
+_GRID_OPEN = '<div style="display:grid;grid-template-columns:repeat(5,1fr);gap:20px;">'
+
+def _random_color_index():
+    """随机返回一个颜色在 _PALETTE 中的下标"""
+    return random.randrange(len(_PALETTE))
 
 class VocabularyApp:
+    """单词数据按列存储（每个字段一个数组，下标即单词编号）
+
+    session_state 中只保存 list/dict/array/bytearray 等内置扁平容器，
+    不保存自定义对象，序列化与跨重跑复用都很廉价
+    """
     def __init__(self):
-        self.words: List[WordItem] = []
-        self.current_round = 0
         self.max_display = 15
         
         # 初始化session_state（仅非小部件状态，避免冲突）
-        if "words" not in st.session_state:
-            st.session_state.words = []
-        if "current_round" not in st.session_state:
-            st.session_state.current_round = 0
-        self.words = st.session_state.words
+        if "texts" not in st.session_state:
+            self._init_session_state()
+        self.texts: List[str] = st.session_state.texts
+        self.counts: array = st.session_state.counts  # 总共出现次数
+        self.last_seen: array = st.session_state.last_seen  # 上次出现的轮次
+        self.visible: bytearray = st.session_state.visible  # 当前是否可见
+        # 显示样式只在加入时随机生成一次，之后每次渲染直接复用
+        self.sizes: array = st.session_state.sizes
+        self.color_idx: array = st.session_state.color_idx  # _PALETTE 下标
+        self.rotations: array = st.session_state.rotations
         self.current_round = st.session_state.current_round
+        # 单词索引（小写文本 -> 单词下标），用于去重
+        self._index: Dict[str, int] = st.session_state.index
+        # 可见单词下标的随机排列（渲染顺序），仅在添加/刷新时重新生成
+        self._order: array = st.session_state.order
+
+    @staticmethod
+    def _init_session_state():
+        st.session_state.texts = []
+        st.session_state.counts = array("i")
+        st.session_state.last_seen = array("i")
+        st.session_state.visible = bytearray()
+        st.session_state.sizes = array("i")
+        st.session_state.color_idx = array("B")
+        st.session_state.rotations = array("d")
+        st.session_state.current_round = 0
+        st.session_state.index = {}
+        st.session_state.order = array("i")
 
     def add_word(self, text: str):
         if not text.strip():
             return
-        new_word = WordItem(text.strip())
-        self.words.append(new_word)
         self.current_round += 1
+        key = text.strip().lower()
+        i = self._index.get(key)
+        if i is not None:
+            # 重复输入视为又复习了一次，不再新建单词
+            self.counts[i] += 1
+            self.last_seen[i] = self.current_round
+        else:
+            i = len(self.texts)
+            self.texts.append(text.strip())
+            self.counts.append(0)
+            self.last_seen.append(0)
+            self.visible.append(1)
+            self.sizes.append(random.randint(30, 60))
+            self.color_idx.append(_random_color_index())
+            self.rotations.append(random.uniform(-15, 15))
+            self._index[key] = i
         self._update_visibility()
-        st.session_state.words = self.words
+        self._rebuild_order()
         st.session_state.current_round = self.current_round
 
     def refresh_layout(self):
+        before = bytes(self.visible)
         self.current_round += 1
         self._update_visibility()
+        if self.visible == before:
+            # 可见单词没有变化：只需原地打乱现有顺序，样式沿用缓存
+            random.shuffle(self._order)
+        else:
+            self._rebuild_order()
         st.session_state.current_round = self.current_round
 
     def clear_all_words(self):
-        self.words = []
+        # 原地清空，session_state 中引用的仍是同一批数组
+        for column in (self.texts, self.counts, self.last_seen, self.visible,
+                       self.sizes, self.color_idx, self.rotations, self._order):
+            del column[:]
+        self._index.clear()
         self.current_round = 0
-        st.session_state.words = []
         st.session_state.current_round = 0
 
     def _update_visibility(self):
-        if len(self.words) <= self.max_display:
-            for word in self.words:
-                word.visible = True
-                word.total_count += 1
-                word.last_seen_round = self.current_round
+        counts, last_seen, visible = self.counts, self.last_seen, self.visible
+        n = len(counts)
+        if n <= self.max_display:
+            # 单词不多时全部显示：整段批量写入，不逐个循环
+            np.frombuffer(counts, dtype=np.intc)[:] += 1
+            last_seen[:] = array("i", [self.current_round]) * n
+            visible[:] = b"\x01" * n
+            return
+        if n > _VECTORIZE_MIN:
+            self._update_visibility_vectorized()
             return
         
-        sorted_words = sorted(self.words, key=lambda x: x.total_count)
-        for i, word in enumerate(sorted_words):
-            if i < self.max_display:
-                word.visible = True
-                word.total_count += 1
-                word.last_seen_round = self.current_round
+        # 从低到高扫描计数桶，取出现次数最少的 max_display 个单词，无需整体排序
+        buckets = self._count_buckets()
+        top = set()
+        for count in sorted(buckets):
+            for i in buckets[count]:
+                top.add(i)
+                if len(top) == self.max_display:
+                    break
+            if len(top) == self.max_display:
+                break
+
+        for i in range(n):
+            if i in top:
+                shown = True
             else:
-                rounds_since_last = self.current_round - word.last_seen_round
-                if word.total_count <= 5 and rounds_since_last >= 2:
-                    word.visible = True
-                elif word.total_count <= 10 and rounds_since_last >= 3:
-                    word.visible = True
-                elif word.total_count > 10 and rounds_since_last >= 5:
-                    word.visible = True
+                count = counts[i]
+                rounds_since_last = self.current_round - last_seen[i]
+                if count <= 5 and rounds_since_last >= 2:
+                    shown = True
+                elif count <= 10 and rounds_since_last >= 3:
+                    shown = True
+                elif count > 10 and rounds_since_last >= 5:
+                    shown = True
                 else:
-                    word.visible = False
-                if word.visible:
-                    word.total_count += 1
-                    word.last_seen_round = self.current_round
+                    shown = False
+            visible[i] = shown
+            if shown:
+                counts[i] += 1
+                last_seen[i] = self.current_round
+
+    def _update_visibility_vectorized(self):
+        # 直接在原数组缓冲区上建立 NumPy 视图（零拷贝），规则与逐个判断完全一致
+        n = len(self.counts)
+        counts = np.frombuffer(self.counts, dtype=np.intc)
+        last_seen = np.frombuffer(self.last_seen, dtype=np.intc)
+        visible = np.frombuffer(self.visible, dtype=np.bool_)
+
+        # 以 (出现次数, 加入顺序) 为键取最小的 max_display 个，平局规则与分桶一致
+        key = counts.astype(np.int64) * n + np.arange(n)
+        top = np.argpartition(key, self.max_display)[:self.max_display]
 
-    def get_visible_word_displays(self):
-        visible_words = [w for w in self.words if w.visible]
+        rounds_since_last = self.current_round - last_seen
+        shown = (
+            ((counts <= 5) & (rounds_since_last >= 2))
+            | ((counts <= 10) & (rounds_since_last >= 3))
+            | ((counts > 10) & (rounds_since_last >= 5))
+        )
+        shown[top] = True
+        visible[:] = shown
+        counts[shown] += 1
+        last_seen[shown] = self.current_round
+
+    def _count_buckets(self) -> Dict[int, List[int]]:
+        """按出现次数分桶（出现次数 -> 单词下标列表）
+
+        出现次数是很小的整数，从 0 号桶往上扫即可取到次数最少的单词；
+        按加入顺序分桶，保证桶内顺序与稳定排序一致。每次使用前现建，
+        不跨轮次保存，也就不存在桶与实际次数不一致的问题
+        """
+        buckets: Dict[int, List[int]] = {}
+        for i, count in enumerate(self.counts):
+            buckets.setdefault(count, []).append(i)
+        return buckets
+
+    def _rebuild_order(self):
+        self._order[:] = array("i", [i for i, v in enumerate(self.visible) if v])
         # 打乱顺序，确保显示位置随机变化
-        random.shuffle(visible_words)
-        # 重新生成随机样式，避免样式固定
-        return [WordDisplay(word) for word in visible_words]
+        random.shuffle(self._order)
+
+    def get_render_order(self):
+        """返回可见单词下标的随机排列，渲染时按下标直接读取各列（含缓存的样式）"""
+        return self._order
+
+def _bootstrap():
+    """页面级静态设置：页面配置与全局样式，集中在脚本开头输出"""
+    # 注意：不能用 st.cache_resource 或 session_state 标记跳过这些调用——Streamlit
+    # 会在重跑时移除本轮未输出的元素，样式会随之丢失；这里只发送模块级常量
+    st.set_page_config(page_title=_TITLE, layout="wide")
+    st.markdown(_RED_BTN_CSS, unsafe_allow_html=True)
 
 def main():
-    st.set_page_config(page_title="A4纸背单词", layout="wide")
+    _bootstrap()
     app = VocabularyApp()
 
     # 顶部输入区域
-    st.title("A4纸背单词")
-    col1, col2, col3 = st.columns([4, 1, 1])
+    st.title(_TITLE)
+    col1, col2 = st.columns(_TOP_COLS)
     
-    # 核心修复：输入框清空方案（不修改小部件绑定状态，无报错）
+    # 输入框与添加按钮放在表单中：输入过程中不触发重跑，提交后自动清空输入框
     with col1:
-        # 方案：使用按钮触发添加后，输入框通过「重新渲染」清空（无状态冲突）
-        word_input = st.text_input(
-            "输入新单词", 
-            placeholder="输入英文单词后点击添加",
-            label_visibility="collapsed"
-        )
-    
+        with st.form("add_word", clear_on_submit=True, border=False):
+            input_col, submit_col = st.columns(_INPUT_COLS)
+            with input_col:
+                word_input = st.text_input(
+                    _INPUT_LABEL,
+                    placeholder=_INPUT_PH,
+                    label_visibility="collapsed"
+                )
+            with submit_col:
+                submitted = st.form_submit_button("添加并刷新", type="primary")
     with col2:
-        add_btn = st.button("添加并刷新", type="primary")
-    with col3:
         clear_btn_clicked = st.button("一键清除所有单词", type="secondary")
-        # 自定义红色按钮样式
-        st.markdown("""
-            <style>
-            div[data-testid="stButton"] > button:last-child {
-                background-color: #d32f2f;
-                color: #ffffff;
-                border: none;
-                border-radius: 4px;
-                padding: 0.5rem 1rem;
-                width: 100%;
-            }
-            div[data-testid="stButton"] > button:last-child:hover {
-                background-color: #b71c1c;
-            }
-            </style>
-        """, unsafe_allow_html=True)
-
-    # 1. 添加单词逻辑（解决输入框清空，无状态报错）
-    if add_btn and word_input.strip():
-        # 执行添加操作
+
+    # 1. 添加单词逻辑（本轮下方直接渲染最新结果，无需 st.rerun）
+    if submitted and word_input.strip():
         app.add_word(word_input.strip())
-        # 关键：通过「跳转自身」实现输入框清空（无状态冲突，兼容高版本）
-        # 利用 Streamlit 按钮点击后重新渲染页面，输入框恢复默认空值
-        st.rerun()  # 高版本 Streamlit 支持，无废弃警告
 
     # 2. 清除所有单词逻辑
     if clear_btn_clicked:
@@ -161,35 +264,25 @@ def main():
         st.rerun()
 
     # 统计信息
-    total = len(app.words)
-    visible = len([w for w in app.words if w.visible])
+    total = len(app.texts)
+    visible = sum(app.visible)
     hidden = total - visible
     st.caption(f"总单词数: {total} | 显示: {visible} | 隐藏: {hidden}")
 
     # 4. 单词显示区域（核心修复：保留完整单词，不换行、不省略，适配iPad）
-    word_displays = app.get_visible_word_displays()
-    if word_displays:
-        cols = st.columns(5)
-        for i, display in enumerate(word_displays):
-            with cols[i % 5]:
-                st.markdown(
-                    f"""
-                    <div style="
-                        font-size: {display.size}px;
-                        color: {display.color};
-                        transform: rotate({display.rotation}deg);
-                        margin: 20px;
-                        text-align: center;
-                        font-weight: bold;
-                        white-space: nowrap; /* 核心：禁止文本自动换行（必须保留） */
-                        min-width: 150px; /* 优化：加大最小宽度，适配长单词，避免挤压 */
-                        padding: 0 10px; /* 优化：左右内边距，让单词更舒展 */
-                    ">
-                        {display.word.text}
-                    </div>
-                    """,
-                    unsafe_allow_html=True
-                )
+    # 卡片区域固定为同一个占位元素，重跑时只替换这一个节点的内容
+    grid_slot = st.empty()
+    order = app.get_render_order()
+    if order:
+        # 所有卡片拼成一段 HTML（5 列网格），一次 st.markdown 发送，避免逐个元素下发
+        parts = [
+            _CARD_TPL.format(
+                s=app.sizes[i], c=_PALETTE[app.color_idx[i]], r=f"{app.rotations[i]:.1f}",
+                t=escape(app.texts[i])
+            )
+            for i in order
+        ]
+        grid_slot.markdown(_GRID_OPEN + "".join(parts) + "</div>", unsafe_allow_html=True)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file